@@ -0,0 +1,234 @@
+"""Statistiskās nozīmības un tendenču aprēķini no uzkrātās statistikas.
+
+Visas funkcijas strādā tikai ar saglabātajiem skaitiem, summām un kvadrātu
+summām (tabula ``metric_stats``), nevis ar atsevišķām atbildēm, tāpēc
+aprēķina izmaksas nav atkarīgas no atbilžu skaita.
+
+Summas glabā par katras atbildes rādītāja vērtību (aptaujas grupas jautājumu
+vidējo), tāpēc rādītāja vidējā vērtība ir ``total / n``.
+"""
+import math
+
+import pandas as pd
+
+ALPHA = 0.05       # nozīmības līmenis
+
+
+# ---------- Studenta t sadalījums ----------
+def _betacf(a, b, x):
+    """Nepilnās beta funkcijas ķēdes daļa (Lentz metode)"""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c = 1.0
+    d = 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 201):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 1e-12:
+            break
+    return h
+
+
+def _betainc(a, b, x):
+    """Regularizētā nepilnā beta funkcija I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    ln_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                + a * math.log(x) + b * math.log(1.0 - x))
+    front = math.exp(ln_front)
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def t_two_sided_p(t, df):
+    """Divpusējā p vērtība t statistikai ar df brīvības pakāpēm"""
+    if math.isinf(t):
+        return 0.0
+    return _betainc(df / 2.0, 0.5, df / (df + t * t))
+
+
+def t_critical(df, level=1 - ALPHA):
+    """Divpusējā t kritiskā vērtība dotajam ticamības līmenim"""
+    target = 1.0 - level
+    low, high = 0.0, 1.0
+    while t_two_sided_p(high, df) > target:
+        high *= 2.0
+    for _ in range(100):
+        mid = (low + high) / 2.0
+        if t_two_sided_p(mid, df) > target:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2.0
+
+
+# ---------- Aprēķini no summām ----------
+def moments(n, total, total_sq):
+    """Atgriež (vidējais, dispersija) rādītājam no n, summas un kvadrātu summas"""
+    if n < 1:
+        return None, None
+    mean = total / n
+    if n < 2:
+        return mean, None
+    var = (total_sq - total * total / n) / (n - 1)
+    return mean, max(var, 0.0)
+
+
+def confidence_interval(n, total, total_sq, level=1 - ALPHA):
+    """Vidējā vērtība un ticamības intervāla pusplatums (None, ja n < 2)"""
+    mean, var = moments(n, total, total_sq)
+    if var is None:
+        return mean, None
+    return mean, t_critical(n - 1, level) * math.sqrt(var / n)
+
+
+def compare_periods(prev, curr, alpha=ALPHA):
+    """
+    Welch t-tests starp diviem periodiem.
+    prev un curr ir (n, total, total_sq); atgriež dict vai None, ja datu par maz
+    vai abos periodos dispersija ir nulle (tests nav piemērojams).
+    """
+    mean1, var1 = moments(*prev)
+    mean2, var2 = moments(*curr)
+    if var1 is None or var2 is None:
+        return None
+    n1, n2 = prev[0], curr[0]
+    diff = mean2 - mean1
+    se2 = var1 / n1 + var2 / n2
+    if se2 == 0:
+        return None
+    df = se2 * se2 / ((var1 / n1) ** 2 / (n1 - 1) + (var2 / n2) ** 2 / (n2 - 1))
+    p_value = t_two_sided_p(diff / math.sqrt(se2), df)
+    return {"diff": diff, "p_value": p_value, "significant": p_value < alpha}
+
+
+def trend_slope(points, alpha=ALPHA):
+    """
+    Lineārās regresijas slīpums (izmaiņas mēnesī) pa visām atbildēm.
+    points ir saraksts ar (x, n, total, total_sq), kur x ir mēneša indekss.
+    Izmanto tikai mēnešu summas, tāpēc izmaksas ir O(mēneši).
+    Ja atlikumu dispersija ir nulle, p_value ir None (nozīmību nevar novērtēt).
+    """
+    N = sum(p[1] for p in points)
+    if len(points) < 2 or N < 3:
+        return None
+    sx = sum(x * n for x, n, _, _ in points)
+    sxx = sum(x * x * n for x, n, _, _ in points)
+    sy = sum(t for _, _, t, _ in points)
+    syy = sum(tsq for _, _, _, tsq in points)
+    sxy = sum(x * t for x, _, t, _ in points)
+
+    Sxx = sxx - sx * sx / N
+    if Sxx <= 0:
+        return None
+    Sxy = sxy - sx * sy / N
+    Syy = syy - sy * sy / N
+    slope = Sxy / Sxx
+    rss = max(Syy - slope * Sxy, 0.0)
+    se = math.sqrt(rss / (N - 2) / Sxx)
+    if se == 0:
+        return {"slope": slope, "p_value": None, "significant": False}
+    p_value = t_two_sided_p(slope / se, N - 2)
+    return {"slope": slope, "p_value": p_value, "significant": p_value < alpha}
+
+
+# ---------- Kopsavilkumi dashboardam ----------
+def _month_index(month):
+    year, mon = month.split("-")
+    return int(year) * 12 + int(mon) - 1
+
+
+def metrics_of(stats_df):
+    """Rādītāju nosaukumi no load_stats_df kolonnām (<metric>_sum)"""
+    return [c[:-len("_sum")] for c in stats_df.columns if c.endswith("_sum")]
+
+
+def _flag(result, up, down):
+    if result is None or not result["significant"]:
+        return ""
+    return up if result.get("diff", result.get("slope")) > 0 else down
+
+
+def monthly_summary(stats_df, alpha=ALPHA):
+    """
+    Mēnešu kopsavilkums vienai nodaļai: vidējās vērtības, ticamības intervāli
+    un izmaiņu nozīmība salīdzinājumā ar iepriekšējo kalendāro mēnesi (ja tajā ir dati).
+    stats_df kolonnas: month, n un <metric>_n, <metric>_sum, <metric>_sumsq.
+    """
+    stats_df = stats_df.sort_values("month")
+    metrics = metrics_of(stats_df)
+    rows = []
+    prev = None
+    prev_index = None
+    for rec in stats_df.to_dict("records"):
+        index = _month_index(rec["month"])
+        if prev_index is None or index - prev_index != 1:
+            prev = None
+        row = {"month": rec["month"], "responses": int(rec["n"])}
+        sums = {m: (rec[f"{m}_n"], rec[f"{m}_sum"], rec[f"{m}_sumsq"]) for m in metrics}
+        for metric, cur in sums.items():
+            mean, half = confidence_interval(*cur, level=1 - alpha)
+            row[metric] = mean
+            row[f"{metric}_ci"] = half
+            change = compare_periods(prev[metric], cur, alpha) if prev else None
+            row[f"{metric}_change_p"] = change["p_value"] if change else None
+            row[f"{metric}_change_sig"] = bool(change and change["significant"])
+        rows.append(row)
+        prev, prev_index = sums, index
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).set_index("month")
+
+
+def summarize_departments(stats_df, alpha=ALPHA):
+    """
+    Nozīmības karodziņi katrai nodaļai no mēnešu statistikas:
+    ticamības intervāls visam periodam, pēdējā mēneša izmaiņa pret iepriekšējo
+    kalendāro mēnesi (tikai, ja abos ir dati) un tendences slīpums. Izmaksas uz nodaļu ir O(mēneši), nevis O(atbildes).
+    """
+    rows = []
+    for department, group in stats_df.groupby("department"):
+        group = group.sort_values("month")
+        months = [_month_index(m) for m in group["month"]]
+        consecutive = len(months) >= 2 and months[-1] - months[-2] == 1
+        row = {"department": department}
+        flags = []
+        for metric in metrics_of(stats_df):
+            sums = group[[f"{metric}_n", f"{metric}_sum", f"{metric}_sumsq"]]
+            total = tuple(sums.sum())
+            _, half = confidence_interval(*total, level=1 - alpha)
+            row[f"{metric}_ci"] = None if half is None else round(half, 2)
+
+            recs = list(sums.itertuples(index=False, name=None))
+            change = compare_periods(recs[-2], recs[-1], alpha) if consecutive else None
+            trend = trend_slope([(x, *r) for x, r in zip(months, recs)], alpha)
+            row[f"{metric}_trend"] = None if trend is None else round(trend["slope"], 2)
+
+            change_flag = _flag(change, "↑", "↓")
+            trend_flag = _flag(trend, "↗", "↘")
+            if change_flag:
+                flags.append(f"{metric} {change_flag} vs prev. month")
+            if trend_flag:
+                flags.append(f"{metric} trend {trend_flag}")
+        row["significance"] = ", ".join(flags)
+        rows.append(row)
+    if not rows:
+        return pd.DataFrame(columns=["significance"])
+    return pd.DataFrame(rows).set_index("department")
@@ -0,0 +1,174 @@
+"""Izmaiņu žurnāls (insert/delete) un stāvokļa atjaunošana uz laika punktu.
+
+Katra izmaiņa tiek pierakstīta tajā pašā transakcijā, kurā mainās dati
+(tabula ``audit_tail``). Kad astē sakrājas ``SEGMENT_RECORDS`` ieraksti, tos
+saspiež vienā segmentā (``audit_segments``). Kompaktu pilna stāvokļa
+momentuzņēmumu (``audit_snapshots``) saglabā ``maybe_snapshot``, kad kopš
+iepriekšējā ir sakrājušies ``SNAPSHOT_EVERY`` segmenti; to izsauc apkopes ceļi
+(inicializācija, dzēšana, kompaktās glabātuves fona pavediens), nevis
+iesniegšana, jo momentuzņēmums nolasa visas atbildes rakstīšanas slēdzenes laikā.
+Stāvokli uz laika punktu iegūst no tuvākā iepriekšējā momentuzņēmuma, atspiežot
+un atskaņojot tikai pēc tā sekojošos segmentus.
+
+Funkcijas saņem SQLite kursoru, lai izsaucējs kontrolē transakciju. Žurnālā
+raksta pēc datu izmaiņas tajā pašā transakcijā, lai momentuzņēmums tajā pašā
+transakcijā redzētu jau izmainīto stāvokli.
+"""
+import json
+import zlib
+from datetime import datetime
+
+SEGMENT_RECORDS = 500   # ieraksti vienā saspiestā segmentā
+SNAPSHOT_EVERY = 20     # segmenti starp momentuzņēmumiem
+
+
+def _pack(obj):
+    return zlib.compress(json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def init_audit(cur):
+    """Izveido žurnāla tabulas; pirmo reizi saglabā sākuma momentuzņēmumu"""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS audit_tail (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT,
+            record TEXT
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS audit_segments (
+            first_seq INTEGER PRIMARY KEY,
+            last_seq INTEGER,
+            first_ts TEXT,
+            last_ts TEXT,
+            records BLOB
+        )
+    ''')
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS audit_snapshots (
+            seq INTEGER PRIMARY KEY,
+            ts TEXT,
+            state BLOB
+        )
+    ''')
+    cur.execute("SELECT 1 FROM audit_snapshots LIMIT 1")
+    if cur.fetchone() is None:
+        take_snapshot(cur)
+    else:
+        maybe_snapshot(cur)
+
+
+# ---------- Rakstīšana ----------
+def log_inserts(cur, responses):
+    """
+    Pieraksta jaunas atbildes (pēc to ievietošanas).
+    responses: saraksts ar (id, timestamp, department, survey_version, {jautājums: vērtība}).
+    """
+    ts = datetime.utcnow().isoformat()
+    cur.executemany(
+        "INSERT INTO audit_tail (ts, record) VALUES (?, ?)",
+        [(ts, json.dumps({"op": "insert", "id": rid, "row": [timestamp, department, version, answers]}))
+         for rid, timestamp, department, version, answers in responses]
+    )
+    _maybe_seal(cur)
+
+
+def log_delete(cur, ids):
+    """Pieraksta dzēsto atbilžu id vienā ierakstā (pēc to dzēšanas)"""
+    if not ids:
+        return
+    cur.execute(
+        "INSERT INTO audit_tail (ts, record) VALUES (?, ?)",
+        (datetime.utcnow().isoformat(), json.dumps({"op": "delete", "ids": list(ids)}))
+    )
+    _maybe_seal(cur)
+
+
+def _maybe_seal(cur):
+    cur.execute("SELECT COUNT(*) FROM audit_tail")
+    if cur.fetchone()[0] >= SEGMENT_RECORDS:
+        seal_segment(cur)
+
+
+def seal_segment(cur):
+    """Saspiež astes ierakstus vienā segmentā"""
+    cur.execute("SELECT seq, ts, record FROM audit_tail ORDER BY seq")
+    rows = cur.fetchall()
+    if not rows:
+        return
+    cur.execute(
+        "INSERT INTO audit_segments (first_seq, last_seq, first_ts, last_ts, records) VALUES (?,?,?,?,?)",
+        (rows[0][0], rows[-1][0], min(r[1] for r in rows), max(r[1] for r in rows),
+         _pack([[seq, ts, json.loads(record)] for seq, ts, record in rows]))
+    )
+    cur.execute("DELETE FROM audit_tail WHERE seq <= ?", (rows[-1][0],))
+
+
+def maybe_snapshot(cur):
+    """Saglabā momentuzņēmumu, ja kopš iepriekšējā ir vismaz SNAPSHOT_EVERY segmenti"""
+    cur.execute("SELECT COALESCE(MAX(seq), 0) FROM audit_snapshots")
+    last_snapshot = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM audit_segments WHERE first_seq > ?", (last_snapshot,))
+    if cur.fetchone()[0] < SNAPSHOT_EVERY:
+        return False
+    take_snapshot(cur)
+    return True
+
+
+def take_snapshot(cur):
+    """Saglabā pašreizējo atbilžu stāvokli kā saspiestu momentuzņēmumu"""
+    cur.execute("SELECT id, timestamp, department, survey_version FROM responses")
+    state = {str(rid): [timestamp, department, version, {}] for rid, timestamp, department, version in cur.fetchall()}
+    cur.execute("SELECT response_id, question_id, value FROM answers")
+    for rid, question_id, value in cur.fetchall():
+        if str(rid) in state:
+            state[str(rid)][3][question_id] = value
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'audit_tail'")
+    row = cur.fetchone()
+    cur.execute(
+        "INSERT OR REPLACE INTO audit_snapshots (seq, ts, state) VALUES (?,?,?)",
+        (row[0] if row else 0, datetime.utcnow().isoformat(), _pack(state))
+    )
+
+
+# ---------- Atjaunošana ----------
+def state_at(cur, as_of):
+    """
+    Atbilžu stāvoklis laika punktā as_of (datetime, UTC):
+    {id: (timestamp, department, survey_version, {jautājums: vērtība})}.
+    Atskaņo tikai segmentus pēc tuvākā momentuzņēmuma.
+    """
+    as_of = as_of.isoformat()
+    cur.execute("SELECT seq, state FROM audit_snapshots WHERE ts <= ? ORDER BY seq DESC LIMIT 1", (as_of,))
+    row = cur.fetchone()
+    if row is None:
+        raise ValueError("No change history is available before the selected time")
+    base_seq = row[0]
+    state = {int(rid): response for rid, response in _unpack(row[1]).items()}
+
+    cur.execute(
+        "SELECT records FROM audit_segments WHERE last_seq > ? AND first_ts <= ? ORDER BY first_seq",
+        (base_seq, as_of)
+    )
+    for (blob,) in cur.fetchall():
+        for seq, ts, record in _unpack(blob):
+            if seq > base_seq and ts <= as_of:
+                _apply(state, record)
+
+    cur.execute("SELECT ts, record FROM audit_tail WHERE seq > ? AND ts <= ? ORDER BY seq", (base_seq, as_of))
+    for ts, record in cur.fetchall():
+        _apply(state, json.loads(record))
+    return state
+
+
+def _apply(state, record):
+    if record["op"] == "insert":
+        state[record["id"]] = record["row"]
+    elif record["op"] == "delete":
+        for rid in record["ids"]:
+            state.pop(rid, None)
+
@@ -0,0 +1,293 @@
+"""Kompakta atbilžu glabātuve procesa atmiņā mazām instalācijām.
+
+Atbildes glabā iepriekš rezervētos tipizētos masīvos: pa vienam ``uint8`` katram
+jautājumam no visām aptaujas versijām (``MISSING``, ja atbildes versijā tāda
+jautājuma nav), ``uint8`` nodaļas kods, ``uint16`` aptaujas versija, ``int64``
+laika zīmogs (mikrosekundes, UTC) un ``int64`` atbildes id datubāzē (0, kamēr
+atbilde nav ierakstīta) – sešu jautājumu aptaujai 25 baiti uz rindu. Glabātuvi
+ielādē vienreiz procesā, jaunas atbildes tikai pievieno, un fona pavediens tās
+ik pēc ``flush_seconds`` (vai uzreiz pēc ``flush_rows`` atbildēm) ieraksta
+``wellbeing.db``. Līdz tam neierakstītās atbildes redz tikai šis process, un
+avārijas gadījumā tās tiek zaudētas. Jaunas atbildes pieņem tikai aktīvajai
+aptaujas versijai (sk. ``switch``).
+"""
+import atexit
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import database
+import surveys
+
+log = logging.getLogger(__name__)
+
+MAX_DEPARTMENTS = 256  # uint8 kodi
+MAX_ANSWER = 254       # uint8 atbildes
+MISSING = 255          # jautājums nav atbildes aptaujas versijā
+
+
+class CompactStore:
+    def __init__(self, survey, capacity=1024, flush_rows=50, flush_seconds=30.0):
+        self.survey = survey
+        self._lock = threading.RLock()
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.departments = []
+        self._codes = {}
+        self._size = 0
+        self._dept = np.zeros(capacity, dtype=np.uint8)
+        self._version = np.zeros(capacity, dtype=np.uint16)
+        self._id = np.zeros(capacity, dtype=np.int64)
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._set_layout()
+        self._pending = []
+        self._stop = threading.Event()
+        self.load()
+        atexit.register(self.close)
+        threading.Thread(target=self._flush_loop, name="compact-store-flush", daemon=True).start()
+
+    def _set_layout(self):
+        """Kolonnas un grupas no visām publicētajām versijām (surveys.combined)"""
+        definitions = database.get_surveys()
+        definitions[self.survey["version"]] = self.survey
+        for definition in definitions.values():
+            if any(q["min"] < 0 or q["max"] > MAX_ANSWER for q in definition["questions"]):
+                raise ValueError(f"The compact store only supports answers between 0 and {MAX_ANSWER}")
+        layout = surveys.combined(definitions)
+        self.columns = layout["question_ids"]
+        self._groups = {
+            group: [self.columns.index(q) for q in qids]
+            for group, qids in layout["group_questions"].items()
+        }
+        self._answers = np.full((len(self._ts), len(self.columns)), MISSING, dtype=np.uint8)
+
+    # ---------- Ielāde un rakstīšana ----------
+    def load(self):
+        """Vienreiz ielādē visu versiju atbildes no SQLite masīvos"""
+        conn = database.get_conn()
+        cur = conn.cursor()
+        cur.execute("SELECT id, timestamp, department, survey_version FROM responses ORDER BY id")
+        rows = cur.fetchall()
+        cur.execute("SELECT response_id, question_id, value FROM answers")
+        answers = cur.fetchall()
+        conn.close()
+
+        with self._lock:
+            self._size = 0
+            self._reserve(len(rows))
+            if not rows:
+                return
+            ids, timestamps, departments, versions = zip(*rows)
+            n = len(rows)
+            position = {response_id: i for i, response_id in enumerate(ids)}
+            column = {q: j for j, q in enumerate(self.columns)}
+            self._answers[:n] = MISSING
+            for response_id, question_id, value in answers:
+                if response_id in position and question_id in column:
+                    self._answers[position[response_id], column[question_id]] = value
+            self._ts[:n] = np.array(timestamps, dtype="datetime64[us]").astype(np.int64)
+            self._dept[:n] = [self._code(d) for d in departments]
+            self._version[:n] = versions
+            self._id[:n] = ids
+            self._size = n
+
+    def switch(self, survey):
+        """
+        Pāriet uz jaunu aktīvo aptaujas versiju: ieraksta iepriekšējās versijas
+        neierakstītās atbildes un pārlādē masīvus ar jaunās versijas kolonnām.
+        """
+        with self._lock:
+            self.flush()
+            self.survey = survey
+            self._set_layout()
+            self.load()
+
+    def append(self, department, answers):
+        """Pievieno atbildi atmiņā; SQLite ieraksta periodiski (sk. flush)"""
+        now = datetime.utcnow()
+        with self._lock:
+            self._reserve(self._size + 1)
+            i = self._size
+            self._answers[i] = [answers.get(q, MISSING) for q in self.columns]
+            self._dept[i] = self._code(department)
+            self._version[i] = self.survey["version"]
+            self._id[i] = 0
+            self._ts[i] = np.datetime64(now, "us").astype(np.int64)
+            self._size += 1
+            self._pending.append((now.isoformat(), department, dict(answers)))
+            if len(self._pending) >= self.flush_rows:
+                try:
+                    self.flush()
+                except sqlite3.OperationalError:
+                    # Atbilde jau saglabāta atmiņā; to ierakstīs fona pavediens
+                    log.warning("Database busy, %d responses left for the background flush", len(self._pending))
+
+    def flush(self):
+        """Ieraksta neierakstītās atbildes wellbeing.db"""
+        with self._lock:
+            if self._pending:
+                ids = database.add_responses(self._pending, self.survey)
+                # Neierakstītās atbildes vienmēr ir masīvu beigās (delete/load vispirms izsauc flush)
+                self._id[self._size - len(ids):self._size] = ids
+                self._pending = []
+
+    def _flush_loop(self):
+        """
+        Fona pavediens: ik pēc flush_seconds ieraksta neierakstītās atbildes
+        un, ja laiks, saglabā izmaiņu žurnāla momentuzņēmumu.
+        """
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+                database.audit_maintenance()
+            except sqlite3.OperationalError:
+                pass  # datubāze aizņemta – mēģina nākamreiz, atbildes paliek _pending
+            except Exception:
+                log.exception("Background flush of the compact store failed; retrying in %g s", self.flush_seconds)
+
+    def close(self):
+        """Aptur fona pavedienu un ieraksta atlikušās atbildes"""
+        self._stop.set()
+        self.flush()
+
+    def delete(self, department=None, start_date=None, end_date=None):
+        """Dzēš atbildes gan SQLite, gan atmiņā (masīvus sablīvē)"""
+        with self._lock:
+            self.flush()
+            database.delete_responses(department=department, start_date=start_date, end_date=end_date)
+            keep = ~self.filter(department, start_date, end_date)
+            n = int(keep.sum())
+            self._answers[:n] = self._answers[:self._size][keep]
+            self._dept[:n] = self._dept[:self._size][keep]
+            self._version[:n] = self._version[:self._size][keep]
+            self._id[:n] = self._id[:self._size][keep]
+            self._ts[:n] = self._ts[:self._size][keep]
+            self._size = n
+
+    def restore(self, as_of):
+        """Atjauno dzēstās atbildes (database.restore_deleted) un pārlādē masīvus"""
+        with self._lock:
+            self.flush()
+            restored = database.restore_deleted(as_of)
+            if restored:
+                self.load()
+            return restored
+
+    def _reserve(self, size):
+        capacity = len(self._ts)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        self._answers = np.resize(self._answers, (capacity, len(self.columns)))
+        self._dept = np.resize(self._dept, capacity)
+        self._version = np.resize(self._version, capacity)
+        self._id = np.resize(self._id, capacity)
+        self._ts = np.resize(self._ts, capacity)
+
+    def _code(self, department):
+        code = self._codes.get(department)
+        if code is None:
+            if len(self.departments) >= MAX_DEPARTMENTS:
+                raise ValueError(f"Too many departments for the compact store (max {MAX_DEPARTMENTS})")
+            code = len(self.departments)
+            self._codes[department] = code
+            self.departments.append(department)
+        return code
+
+    # ---------- Vektorizēta filtrēšana un agregācija ----------
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        """Aizņemtie baiti izmantotajām rindām (sešiem jautājumiem 25 uz rindu)"""
+        per_row = (self._answers.itemsize * self._answers.shape[1] + self._dept.itemsize
+                   + self._version.itemsize + self._ts.itemsize + self._id.itemsize)
+        return per_row * self._size
+
+    def filter(self, department=None, start_date=None, end_date=None):
+        """
+        Būla maska pēc nodaļas un/vai datuma diapazona (ieskaitot galapunktus).
+        Maska der tikai līdz nākamajai izmaiņai; aggregate un to_frame filtrē paši.
+        """
+        with self._lock:
+            mask = np.ones(self._size, dtype=bool)
+            if department:
+                code = self._codes.get(department)
+                if code is None:
+                    return np.zeros(self._size, dtype=bool)
+                mask &= self._dept[:self._size] == code
+            ts = self._ts[:self._size]
+            if start_date:
+                mask &= ts >= np.datetime64(start_date, "us").astype(np.int64)
+            if end_date:
+                mask &= ts < np.datetime64(end_date + timedelta(days=1), "us").astype(np.int64)
+            return mask
+
+    def aggregate(self, department=None, start_date=None, end_date=None, by="department"):
+        """
+        Vidējās vērtības pa nodaļām (by="department") vai mēnešiem (by="month").
+        Kolonnas: katra jautājuma vidējais, katras aptaujas grupas rādītājs un total_responses.
+        Jautājumus, kuru nav atbildes versijā, vidējos neieskaita.
+        """
+        with self._lock:
+            # Maska un masīvi vienā slēdzenes turēšanā – vienlaicīgs append nemaina izmēru
+            mask = self.filter(department, start_date, end_date)
+            answers = self._view(self._answers, mask)
+            if by == "department":
+                keys = self._view(self._dept, mask)
+                labels = np.array(self.departments, dtype=object)
+            elif by == "month":
+                months = self._view(self._ts, mask).astype("datetime64[us]").astype("datetime64[M]")
+                uniq, keys = np.unique(months, return_inverse=True)
+                labels = uniq.astype(str)
+            else:
+                raise ValueError(f"Unknown grouping: {by}")
+
+        counts = np.bincount(keys, minlength=len(labels))
+        present = counts > 0
+        answered = answers != MISSING
+        values = np.where(answered, answers, 0).astype(np.float64)
+
+        def means(weights, mask):
+            sums = np.bincount(keys, weights=np.where(mask, weights, 0.0), minlength=len(labels))
+            n = np.bincount(keys, weights=mask.astype(np.float64), minlength=len(labels))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return (sums / n)[present]
+
+        result = pd.DataFrame(
+            {q: means(values[:, j], answered[:, j]) for j, q in enumerate(self.columns)},
+            index=pd.Index(labels[present], name=by)
+        )
+        # Grupas rādītājs katrai atbildei ir tās versijas grupas jautājumu vidējais (kā surveys.scores)
+        for group, positions in self._groups.items():
+            n = answered[:, positions].sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scores = values[:, positions].sum(axis=1) / n
+            result[group] = means(np.nan_to_num(scores), n > 0)
+        result["total_responses"] = counts[present]
+        return result.sort_index()
+
+    def to_frame(self, department=None, start_date=None, end_date=None):
+        """DataFrame tādā pašā formā kā load_responses_df (tikai filtram atbilstošās rindas)"""
+        with self._lock:
+            mask = self.filter(department, start_date, end_date)
+            answers = self._view(self._answers, mask)
+            df = pd.DataFrame(answers, columns=self.columns).where(answers != MISSING)
+            # Vēl neierakstītajām atbildēm id nav (NA)
+            ids = self._view(self._id, mask)
+            df.insert(0, "id", pd.arrays.IntegerArray(ids.copy(), ids == 0))
+            df.insert(1, "timestamp", self._view(self._ts, mask).astype("datetime64[us]"))
+            df.insert(2, "department", pd.Categorical.from_codes(
+                self._view(self._dept, mask), categories=self.departments
+            ))
+            df.insert(3, "survey_version", self._view(self._version, mask).astype(np.int64))
+        return df
+
+    def _view(self, array, mask):
+        return array[:self._size][mask]
@@ -0,0 +1,500 @@
+"""Datubāzes palīgfunkcijas (SQLite) atbilžu glabāšanai."""
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import audit_log
+import surveys
+
+DB_PATH = "wellbeing.db"
+
+# ---------- Database helpers ----------
+def get_conn():
+    return sqlite3.connect(DB_PATH, check_same_thread=False)
+
+def init_db():
+    """Inicializē datubāzi ar pareizo struktūru"""
+    conn = get_conn()
+    cur = conn.cursor()
+    # Atbilžu galvene; pašas atbildes glabājas tabulā answers
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS responses (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT,
+            department TEXT,
+            survey_version INTEGER
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+    init_surveys()
+    init_answers()
+    # Ja atklājam veco struktūru, migrējam datus
+    migrate_database()
+    init_stats()
+    init_audit_log()
+
+# ---------- Aptaujas definīcijas ----------
+def init_surveys():
+    """Izveido definīciju tabulu un publicē noklusējuma aptauju"""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS survey_definitions (
+            version INTEGER PRIMARY KEY,
+            definition TEXT,
+            published_at TEXT,
+            retired_at TEXT
+        )
+    ''')
+    cur.execute("PRAGMA table_info(survey_definitions)")
+    if "retired_at" not in [col[1] for col in cur.fetchall()]:
+        cur.execute("ALTER TABLE survey_definitions ADD COLUMN retired_at TEXT")
+    cur.execute(
+        "INSERT OR IGNORE INTO survey_definitions (version, definition, published_at) VALUES (?,?,?)",
+        (surveys.DEFAULT_SURVEY["version"], json.dumps(surveys.DEFAULT_SURVEY), datetime.utcnow().isoformat())
+    )
+    conn.commit()
+    conn.close()
+
+def publish_survey(survey):
+    """
+    Publicē jaunu aptaujas versiju. Tabulas netiek mainītas – jaunie jautājumi
+    vienkārši parādās kā jaunas rindas tabulā answers.
+    """
+    surveys.validate(survey)
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM survey_definitions WHERE version = ?", (survey["version"],))
+    if cur.fetchone() is not None:
+        conn.close()
+        raise ValueError(f"Survey version {survey['version']} already exists")
+    cur.execute(
+        "INSERT INTO survey_definitions (version, definition, published_at) VALUES (?,?,?)",
+        (survey["version"], json.dumps(survey), datetime.utcnow().isoformat())
+    )
+    conn.commit()
+    conn.close()
+
+def retire_survey(version):
+    """
+    Atsauc aptaujas versiju (piem., kļūdaini publicētu): forma atgriežas pie
+    iepriekšējās aktīvās versijas. Jau saņemtās atbildes paliek dashboardā.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT version FROM survey_definitions WHERE retired_at IS NULL")
+    active = [row[0] for row in cur.fetchall()]
+    if version not in active:
+        conn.close()
+        raise ValueError(f"Survey version {version} is not an active version")
+    if len(active) == 1:
+        conn.close()
+        raise ValueError("Cannot retire the only active survey version")
+    cur.execute(
+        "UPDATE survey_definitions SET retired_at = ? WHERE version = ?",
+        (datetime.utcnow().isoformat(), version)
+    )
+    conn.commit()
+    conn.close()
+
+def get_surveys():
+    """
+    Publicētās versijas dashboardam: {version: definīcija}. Atsauktās versijas
+    iekļauj tikai tad, ja tām ir atbildes.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute('''
+        SELECT version, definition FROM survey_definitions
+        WHERE retired_at IS NULL OR version IN (SELECT DISTINCT survey_version FROM responses)
+    ''')
+    result = {version: json.loads(definition) for version, definition in cur.fetchall()}
+    conn.close()
+    return result
+
+def get_survey(version=None):
+    """Aptaujas definīcija; bez versijas – jaunākā neatsauktā (aktīvā)"""
+    conn = get_conn()
+    cur = conn.cursor()
+    if version is None:
+        cur.execute("SELECT definition FROM survey_definitions WHERE retired_at IS NULL ORDER BY version DESC LIMIT 1")
+    else:
+        cur.execute("SELECT definition FROM survey_definitions WHERE version = ?", (version,))
+    row = cur.fetchone()
+    conn.close()
+    if row is None:
+        raise ValueError(f"Unknown survey version: {version}")
+    return json.loads(row[0])
+
+# ---------- Atbildes (garā forma) ----------
+# Vecās fiksētās kolonnas: katram 1. versijas jautājumam sava kolonna (stress_q1, ...)
+# vai vēl senāk viena kolonna grupai (stress, motivation)
+LEGACY_SOURCES = {
+    q["id"]: (q["id"], q["group"]) for q in surveys.DEFAULT_SURVEY["questions"]
+}
+
+def init_answers():
+    """Izveido tabulu answers"""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS answers (
+            response_id INTEGER,
+            question_id TEXT,
+            value INTEGER,
+            PRIMARY KEY (response_id, question_id)
+        )
+    ''')
+    conn.commit()
+    conn.close()
+
+def migrate_database():
+    """
+    Vecām datubāzēm (bez survey_version) vienreiz pievieno kolonnu survey_version
+    un pārnes fiksēto kolonnu vērtības uz answers – bez tabulas pārrakstīšanas.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("PRAGMA table_info(responses)")
+    columns = [col[1] for col in cur.fetchall()]
+    if 'survey_version' in columns:
+        conn.close()
+        return
+
+    try:
+        for question_id, candidates in LEGACY_SOURCES.items():
+            # Jautājuma kolonna, ja tāda ir, citādi grupas kolonna (vērtība visiem grupas jautājumiem)
+            column = next((c for c in candidates if c in columns), None)
+            if column is None:
+                continue
+            cur.execute(
+                f"INSERT OR IGNORE INTO answers (response_id, question_id, value) "
+                f"SELECT id, ?, {column} FROM responses WHERE {column} IS NOT NULL",
+                (question_id,)
+            )
+        # Pēc INSERT transakcija jau ir atvērta, tāpēc ALTER tiek atsaukts kopā ar tiem
+        cur.execute(f"ALTER TABLE responses ADD COLUMN survey_version INTEGER DEFAULT {surveys.DEFAULT_SURVEY['version']}")
+        conn.commit()
+        print("✅ Datubāze atjaunināta uz jauno versiju")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Kļūda migrējot datubāzi: {e}")
+    finally:
+        conn.close()
+
+# ---------- Uzkrātā statistika (skaiti, summas, kvadrātu summas) ----------
+def init_stats():
+    """Izveido statistikas tabulu un vienreiz aizpilda to no esošajām atbildēm"""
+    conn = get_conn()
+    cur = conn.cursor()
+    # Iepriekšējā platā statistikas tabula – tā ir atvasināta, tāpēc to var vienkārši aizstāt
+    cur.execute("DROP TABLE IF EXISTS response_stats")
+    # Viena rinda katram rādītājam (aptaujas grupai) nodaļā dienā
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS metric_stats (
+            department TEXT,
+            day TEXT,
+            metric TEXT,
+            n INTEGER,
+            total REAL,
+            total_sq REAL,
+            PRIMARY KEY (department, day, metric)
+        )
+    ''')
+    # Paaudzes skaitītājs: mainās katru reizi, kad mainās statistika (kešatmiņas atslēgai)
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS stats_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            generation INTEGER
+        )
+    ''')
+    cur.execute("INSERT OR IGNORE INTO stats_generation (id, generation) VALUES (0, 0)")
+    cur.execute("SELECT 1 FROM metric_stats LIMIT 1")
+    if cur.fetchone() is None:
+        _apply_stats(cur, _collect_stats(cur, " WHERE 1=1", []), sign=1)
+        bump_generation(cur)
+    conn.commit()
+    conn.close()
+
+def init_audit_log():
+    """Izmaiņu žurnāls un indeksi dzēšanas filtriem"""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_department_timestamp ON responses (department, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_responses_timestamp ON responses (timestamp)")
+    # Pēdējais piešķirtais atbildes id – dzēsto atbilžu id netiek izmantoti atkārtoti
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS response_sequence (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            last_id INTEGER
+        )
+    ''')
+    cur.execute("INSERT OR IGNORE INTO response_sequence (id, last_id) SELECT 0, COALESCE(MAX(id), 0) FROM responses")
+    audit_log.init_audit(cur)
+    conn.commit()
+    conn.close()
+
+def _collect_stats(cur, where, params):
+    """Saskaita rādītāju summas atbildēm, kas atbilst where nosacījumam"""
+    definitions = {}
+    cur.execute(f'''
+        SELECT r.id, r.department, DATE(r.timestamp), r.survey_version, a.question_id, a.value
+        FROM responses r JOIN answers a ON a.response_id = r.id{where}
+        ORDER BY r.id
+    ''', params)
+    stats = {}
+    current, answers = None, {}
+
+    def add(key, answers):
+        department, day, version = key[1:]
+        if version not in definitions:
+            definitions[version] = get_survey(version)
+        for metric, score in surveys.scores(definitions[version], answers).items():
+            _accumulate(stats, department, day, metric, score)
+
+    for response_id, department, day, version, question_id, value in cur.fetchall():
+        key = (response_id, department, day, version)
+        if key != current:
+            if current is not None:
+                add(current, answers)
+            current, answers = key, {}
+        answers[question_id] = value
+    if current is not None:
+        add(current, answers)
+    return stats
+
+def _accumulate(stats, department, day, metric, score):
+    acc = stats.setdefault((department, day, metric), [0, 0.0, 0.0])
+    acc[0] += 1
+    acc[1] += score
+    acc[2] += score * score
+
+def _apply_stats(cur, stats, sign):
+    """Pieskaita (sign=1) vai atņem (sign=-1) summas tabulā metric_stats"""
+    cur.executemany('''
+        INSERT INTO metric_stats (department, day, metric, n, total, total_sq)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(department, day, metric) DO UPDATE SET
+            n = n + excluded.n,
+            total = total + excluded.total,
+            total_sq = total_sq + excluded.total_sq
+    ''', [(dept, day, metric, sign * n, sign * total, sign * total_sq)
+          for (dept, day, metric), (n, total, total_sq) in stats.items()])
+    if sign < 0:
+        cur.execute("DELETE FROM metric_stats WHERE n <= 0")
+
+def bump_generation(cur):
+    """Palielina statistikas paaudzi (izsauc tajā pašā transakcijā, kur mainās dati)"""
+    cur.execute("UPDATE stats_generation SET generation = generation + 1 WHERE id = 0")
+
+def get_generation():
+    """Pašreizējā statistikas paaudze"""
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT generation FROM stats_generation WHERE id = 0")
+    row = cur.fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def load_stats_df(start_date=None, end_date=None):
+    """
+    Mēnešu statistika pa nodaļām no metric_stats (bez atbilžu pārlasīšanas).
+    Kolonnas: department, month, n un katram rādītājam <metric>_n, <metric>_sum, <metric>_sumsq.
+    """
+    query = '''
+        SELECT department, substr(day, 1, 7) AS month, metric,
+               SUM(n) AS n, SUM(total) AS total, SUM(total_sq) AS total_sq
+        FROM metric_stats WHERE n > 0
+    '''
+    params = []
+    if start_date:
+        query += " AND day >= ?"
+        params.append(start_date.strftime("%Y-%m-%d"))
+    if end_date:
+        query += " AND day <= ?"
+        params.append(end_date.strftime("%Y-%m-%d"))
+    query += " GROUP BY department, month, metric"
+
+    conn = get_conn()
+    long_df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    if long_df.empty:
+        return pd.DataFrame(columns=["department", "month", "n"])
+
+    wide = long_df.pivot(index=["department", "month"], columns="metric", values=["n", "total", "total_sq"])
+    df = pd.DataFrame(index=wide.index)
+    for metric in long_df["metric"].unique():
+        df[f"{metric}_n"] = wide[("n", metric)].fillna(0).astype(int)
+        df[f"{metric}_sum"] = wide[("total", metric)].fillna(0.0)
+        df[f"{metric}_sumsq"] = wide[("total_sq", metric)].fillna(0.0)
+    df.insert(0, "n", wide["n"].max(axis=1).astype(int))
+    return df.reset_index().sort_values(["department", "month"], ignore_index=True)
+
+def add_response(department, answers, survey=None):
+    """Saglabā vienu atbildi; answers: {jautājuma id: vērtība}"""
+    add_responses([(datetime.utcnow().isoformat(), department, answers)], survey)
+
+def add_responses(rows, survey=None):
+    """
+    Saglabā vairākas atbildes vienā transakcijā un atjauno statistiku.
+    Katra rinda: (timestamp, department, {jautājuma id: vērtība}).
+    Atgriež piešķirtos atbilžu id rindu secībā.
+    """
+    if survey is None:
+        survey = get_survey()
+    known = set(surveys.question_ids(survey))
+    stats = {}
+    for timestamp, department, answers in rows:
+        unknown = set(answers) - known
+        if unknown:
+            raise ValueError(f"Unknown questions for survey version {survey['version']}: {sorted(unknown)}")
+        for metric, score in surveys.scores(survey, answers).items():
+            _accumulate(stats, department, timestamp[:10], metric, score)
+
+    conn = get_conn()
+    cur = conn.cursor()
+    # Vispirms rezervē id (rakstīšana uzreiz paņem datubāzes slēdzeni)
+    cur.execute("UPDATE response_sequence SET last_id = last_id + ? WHERE id = 0", (len(rows),))
+    cur.execute("SELECT last_id FROM response_sequence WHERE id = 0")
+    first_id = cur.fetchone()[0] - len(rows) + 1
+    logged = []
+    for response_id, (timestamp, department, answers) in enumerate(rows, start=first_id):
+        cur.execute(
+            "INSERT INTO responses (id, timestamp, department, survey_version) VALUES (?,?,?,?)",
+            (response_id, timestamp, department, survey["version"])
+        )
+        cur.executemany(
+            "INSERT INTO answers (response_id, question_id, value) VALUES (?,?,?)",
+            [(response_id, question_id, value) for question_id, value in answers.items()]
+        )
+        logged.append((response_id, timestamp, department, survey["version"], answers))
+    # Atjauno statistiku un žurnālu tajā pašā transakcijā
+    _apply_stats(cur, stats, sign=1)
+    audit_log.log_inserts(cur, logged)
+    bump_generation(cur)
+    conn.commit()
+    conn.close()
+    return [response[0] for response in logged]
+
+def load_responses_df():
+    """Atbildes platā formā: viena kolonna katram jautājumam no visām versijām"""
+    question_columns = surveys.combined(get_surveys())["question_ids"]
+    conn = get_conn()
+    df = pd.read_sql_query(
+        "SELECT id, timestamp, department, survey_version FROM responses", conn, parse_dates=["timestamp"]
+    )
+    answers = pd.read_sql_query("SELECT response_id, question_id, value FROM answers", conn)
+    conn.close()
+    if df.empty:
+        return pd.DataFrame(columns=["id", "timestamp", "department", "survey_version"] + question_columns)
+
+    wide = answers.pivot(index="response_id", columns="question_id", values="value")
+    wide = wide.reindex(columns=question_columns)
+    return df.join(wide, on="id")
+
+def _response_filter(department=None, start_date=None, end_date=None):
+    """
+    WHERE nosacījums atbilžu atlasei pēc nodaļas un datuma diapazona.
+    Salīdzina pašu timestamp (nevis DATE(timestamp)), lai varētu izmantot indeksus.
+    """
+    where = " WHERE 1=1"
+    params = []
+    if department:
+        where += " AND department = ?"
+        params.append(department)
+    if start_date:
+        where += " AND timestamp >= ?"
+        params.append(start_date.strftime("%Y-%m-%d"))
+    if end_date:
+        where += " AND timestamp < ?"
+        params.append((end_date + timedelta(days=1)).strftime("%Y-%m-%d"))
+    return where, params
+
+def preview_delete(department=None, start_date=None, end_date=None):
+    """Cik atbilžu tiktu dzēstas ar šiem filtriem (neko nemaina)"""
+    where, params = _response_filter(department, start_date, end_date)
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM responses" + where, params)
+    count = cur.fetchone()[0]
+    conn.close()
+    return count
+
+def delete_responses(department=None, start_date=None, end_date=None):
+    """
+    Dzēš datus pēc nodaļas un/vai datuma diapazona.
+    Ja abi parametri None, dzēš visu tabulu. Dzēstās atbildes var atjaunot ar restore_deleted.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    where, params = _response_filter(department, start_date, end_date)
+
+    # Atņem dzēšamās atbildes no statistikas
+    _apply_stats(cur, _collect_stats(cur, where, params), sign=-1)
+    bump_generation(cur)
+
+    cur.execute("SELECT id FROM responses" + where, params)
+    ids = [row[0] for row in cur.fetchall()]
+    cur.execute("DELETE FROM answers WHERE response_id IN (SELECT id FROM responses" + where + ")", params)
+    cur.execute("DELETE FROM responses" + where, params)
+    # Žurnālā raksta pēc dzēšanas, lai momentuzņēmums jau redzētu dzēsto stāvokli
+    audit_log.log_delete(cur, ids)
+    audit_log.maybe_snapshot(cur)
+    conn.commit()
+    conn.close()
+
+def audit_maintenance():
+    """
+    Saglabā izmaiņu žurnāla momentuzņēmumu, ja tas ir laikā. Izsauc ārpus
+    iesniegšanas ceļa (fona pavedienā), jo momentuzņēmums nolasa visas atbildes.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    taken = audit_log.maybe_snapshot(cur)
+    conn.commit()
+    conn.close()
+    return taken
+
+def restore_deleted(as_of):
+    """
+    Atjauno atbildes, kas pastāvēja laika punktā as_of (datetime, UTC), bet
+    kopš tā laika ir dzēstas. Atgriež atjaunoto atbilžu skaitu.
+    """
+    conn = get_conn()
+    cur = conn.cursor()
+    state = audit_log.state_at(cur, as_of)
+    cur.execute("SELECT id FROM responses")
+    existing = {row[0] for row in cur.fetchall()}
+    missing = sorted(rid for rid in state if rid not in existing)
+
+    definitions = {}
+    stats = {}
+    restored = []
+    for rid in missing:
+        timestamp, department, version, answers = state[rid]
+        cur.execute(
+            "INSERT INTO responses (id, timestamp, department, survey_version) VALUES (?,?,?,?)",
+            (rid, timestamp, department, version)
+        )
+        cur.executemany(
+            "INSERT INTO answers (response_id, question_id, value) VALUES (?,?,?)",
+            [(rid, question_id, value) for question_id, value in answers.items()]
+        )
+        if version not in definitions:
+            definitions[version] = get_survey(version)
+        for metric, score in surveys.scores(definitions[version], answers).items():
+            _accumulate(stats, department, timestamp[:10], metric, score)
+        restored.append((rid, timestamp, department, version, answers))
+
+    if restored:
+        _apply_stats(cur, stats, sign=1)
+        bump_generation(cur)
+        audit_log.log_inserts(cur, restored)
+        audit_log.maybe_snapshot(cur)
+    conn.commit()
+    conn.close()
+    return len(restored)
@@ -0,0 +1,256 @@
+"""Slodzes tests: vienlaicīgi aptaujas iesniedzēji un HR dashboarda skatītāji.
+
+Darbina iesniegšanas ceļu (``add_response``) un HR dashboarda datu ceļu
+(atbildes, statistika, anonimitātes pārbaude, nozīmības aprēķini) no daudziem
+pavedieniem pret pagaidu datubāzi un atskaitās par caurlaidību, p50/p95/p99
+latentumu un SQLite bloķēšanas kļūdu īpatsvaru. Abas operācijas ietver arī
+darbu, ko wellbeing.py dara katrā Streamlit pārlādē (aptaujas definīciju
+nolasīšana); ar ``--init-every-rerun`` arī shēmas inicializāciju ``init_db``.
+
+Piemērs:
+    python loadtest.py --submitters 50 --viewers 5 --duration 60 --think 3
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+import analytics
+import database
+import privacy
+
+DEPARTMENTS = [
+    "Administration",
+    "Customer Invoicing",
+    "Finance & Accounting",
+    "Commercial Reporting & BI",
+    "Information Technology",
+    "OVA",
+    "Documentation, Pricing & Legal",
+]
+
+
+class Recorder:
+    """Savāc latentumus un kļūdas katrai operācijai (pavedienu drošs)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.lock_errors = {}
+        self.other_errors = {}
+        self.error_types = {}       # {operation: {exception tips: skaits}}
+        self.first_traceback = {}   # pirmā neparedzētās kļūdas izsekošana katrai operācijai
+
+    def record(self, operation, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            if isinstance(e, sqlite3.OperationalError) and ("locked" in str(e) or "busy" in str(e)):
+                with self._lock:
+                    self.lock_errors[operation] = self.lock_errors.get(operation, 0) + 1
+                return
+            with self._lock:
+                self.other_errors[operation] = self.other_errors.get(operation, 0) + 1
+                types = self.error_types.setdefault(operation, {})
+                types[type(e).__name__] = types.get(type(e).__name__, 0) + 1
+                self.first_traceback.setdefault(operation, traceback.format_exc())
+            return
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.setdefault(operation, []).append(elapsed)
+
+
+def percentile(values, p):
+    """Tuvākā ranga procentile no sakārtota saraksta"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(values)))
+    return values[rank - 1]
+
+
+def random_answers(survey, rng):
+    return {q["id"]: rng.randint(q["min"], q["max"]) for q in survey["questions"]}
+
+
+def seed_database(survey, rows, days, rng):
+    """Aizpilda datubāzi ar vēsturiskām atbildēm pēdējo dienu periodā"""
+    now = datetime.utcnow()
+    batch = [
+        ((now - timedelta(seconds=rng.uniform(0, days * 86400))).isoformat(),
+         rng.choice(DEPARTMENTS), random_answers(survey, rng))
+        for _ in range(rows)
+    ]
+    for i in range(0, len(batch), 1000):
+        database.add_responses(batch[i:i + 1000], survey)
+
+
+def rerun(init_every_rerun):
+    """Darbs, ko wellbeing.py veic katras pārlādes sākumā pirms formas vai dashboarda"""
+    if init_every_rerun:
+        database.init_db()
+    database.get_survey()
+    database.get_surveys()
+
+
+def submit(survey, department, answers, init_every_rerun):
+    rerun(init_every_rerun)
+    database.add_response(department, answers, survey)
+
+
+def dashboard_read(start_date, end_date, init_every_rerun):
+    """HR dashboarda datu ceļš bez Streamlit (tas pats, ko izsauc wellbeing.py)"""
+    rerun(init_every_rerun)
+    database.load_responses_df()
+    database.get_generation()
+    stats = database.load_stats_df(start_date, end_date)
+    privacy.anonymity_check(stats)
+    analytics.summarize_departments(stats)
+
+
+def think(rng, mean, deadline):
+    """Eksponenciāli sadalīts domāšanas laiks, bet ne ilgāk par testa beigām"""
+    pause = rng.expovariate(1.0 / mean) if mean > 0 else 0.0
+    time.sleep(max(0.0, min(pause, deadline - time.monotonic())))
+
+
+def submitter(survey, recorder, deadline, ramp, think_mean, init_every_rerun, seed):
+    rng = random.Random(seed)
+    time.sleep(rng.uniform(0, ramp))
+    while True:
+        think(rng, think_mean, deadline)
+        if time.monotonic() >= deadline:
+            return
+        department = rng.choice(DEPARTMENTS)
+        answers = random_answers(survey, rng)
+        recorder.record("submit", lambda: submit(survey, department, answers, init_every_rerun))
+
+
+def viewer(recorder, deadline, ramp, think_mean, days, init_every_rerun, seed):
+    rng = random.Random(seed)
+    time.sleep(rng.uniform(0, ramp))
+    end_date = datetime.utcnow().date()
+    start_date = end_date - timedelta(days=days)
+    while True:
+        think(rng, think_mean, deadline)
+        if time.monotonic() >= deadline:
+            return
+        recorder.record("dashboard", lambda: dashboard_read(start_date, end_date, init_every_rerun))
+
+
+def summarize(recorder, elapsed):
+    report = {}
+    for operation in sorted(set(recorder.latencies) | set(recorder.lock_errors) | set(recorder.other_errors)):
+        values = sorted(recorder.latencies.get(operation, []))
+        locked = recorder.lock_errors.get(operation, 0)
+        failed = recorder.other_errors.get(operation, 0)
+        attempts = len(values) + locked + failed
+        report[operation] = {
+            "ok": len(values),
+            "lock_errors": locked,
+            "other_errors": failed,
+            "error_types": recorder.error_types.get(operation, {}),
+            "first_traceback": recorder.first_traceback.get(operation),
+            "lock_error_rate": locked / attempts if attempts else 0.0,
+            "throughput_per_s": len(values) / elapsed if elapsed else 0.0,
+            "p50_ms": _ms(percentile(values, 50)),
+            "p95_ms": _ms(percentile(values, 95)),
+            "p99_ms": _ms(percentile(values, 99)),
+            "max_ms": _ms(values[-1] if values else None),
+        }
+    return report
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_report(report, elapsed, args):
+    init = ", init_db on every rerun" if args.init_every_rerun else ""
+    print(f"\nLoad test: {args.submitters} submitters, {args.viewers} viewers, {elapsed:.1f}s{init}")
+    header = f"{'operation':<10} {'ok':>7} {'lock err':>9} {'err':>5} {'lock %':>7} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for operation, r in report.items():
+        print(f"{operation:<10} {r['ok']:>7} {r['lock_errors']:>9} {r['other_errors']:>5} "
+              f"{r['lock_error_rate'] * 100:>6.2f}% {r['throughput_per_s']:>8.2f} "
+              f"{_fmt(r['p50_ms']):>8} {_fmt(r['p95_ms']):>8} {_fmt(r['p99_ms']):>8} {_fmt(r['max_ms']):>8}")
+    for operation, r in report.items():
+        if r["first_traceback"]:
+            types = ", ".join(f"{name} x{count}" for name, count in r["error_types"].items())
+            print(f"\n{operation} errors: {types}\nFirst traceback:\n{r['first_traceback']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the survey submit path and the HR dashboard data path.")
+    parser.add_argument("--submitters", type=int, default=20, help="concurrent employees submitting the survey")
+    parser.add_argument("--viewers", type=int, default=2, help="concurrent HR dashboard viewers")
+    parser.add_argument("--duration", type=float, default=30.0, help="test duration in seconds")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which users start")
+    parser.add_argument("--think", type=float, default=3.0, help="mean think time between submissions (s)")
+    parser.add_argument("--viewer-think", type=float, default=10.0, help="mean think time between dashboard loads (s)")
+    parser.add_argument("--seed-rows", type=int, default=1000, help="historical responses to preload")
+    parser.add_argument("--days", type=int, default=180, help="period covered by seed data and dashboard range")
+    parser.add_argument("--db", help="start from a copy of this database file; the file itself is not modified (default: an empty database)")
+    parser.add_argument("--init-every-rerun", action="store_true",
+                        help="also run init_db on every simulated rerun (the app before schema init was cached)")
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    # Tests vienmēr strādā ar pagaidu datubāzi; --db tikai nosaka tās sākuma saturu
+    tmpdir = tempfile.TemporaryDirectory(prefix="wellbeing-loadtest-")
+    database.DB_PATH = os.path.join(tmpdir.name, "wellbeing.db")
+    if args.db:
+        shutil.copyfile(args.db, database.DB_PATH)
+
+    try:
+        database.init_db()
+        survey = database.get_survey()
+        rng = random.Random(args.random_seed)
+        if args.seed_rows:
+            seed_database(survey, args.seed_rows, args.days, rng)
+
+        recorder = Recorder()
+        deadline = time.monotonic() + args.duration
+        threads = [
+            threading.Thread(target=submitter, daemon=True,
+                             args=(survey, recorder, deadline, args.ramp, args.think, args.init_every_rerun,
+                                   rng.random()))
+            for _ in range(args.submitters)
+        ] + [
+            threading.Thread(target=viewer, daemon=True,
+                             args=(recorder, deadline, args.ramp, args.viewer_think, args.days,
+                                   args.init_every_rerun, rng.random()))
+            for _ in range(args.viewers)
+        ]
+        started = time.monotonic()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - started
+
+        report = summarize(recorder, elapsed)
+        print_report(report, elapsed, args)
+        if args.json_path:
+            with open(args.json_path, "w") as f:
+                json.dump({"elapsed_s": elapsed, "config": vars(args), "operations": report}, f, indent=2)
+    finally:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
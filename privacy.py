@@ -0,0 +1,85 @@
+"""Anonimitātes slieksnis (k-anonimitāte) dashboard agregātiem un Excel eksportam.
+
+Pārbaudi veic vienreiz uz statistikas paaudzi no saglabātajiem skaitiem
+(``metric_stats``); rezultātu kešo izsaucējs, tāpēc katrā skatā atliek tikai
+uzmeklēt jau aprēķinātās kopas.
+"""
+import os
+
+import pandas as pd
+
+# Minimālais atbilžu skaits, lai rādītu šūnu
+MIN_RESPONSES = int(os.environ.get("WELLBEING_MIN_RESPONSES", "5"))
+MERGED_LABEL = "Other departments (merged)"
+SUPPRESSED = "hidden"
+
+# Kolonnas, kuras apvienojot summē, nevis vidējo
+SUM_COLUMNS = ("total_responses",)
+
+
+def anonymity_check(stats_df, k=MIN_RESPONSES):
+    """
+    Aprēķina, kuras nodaļas un nodaļu mēneši ir zem sliekšņa k.
+    stats_df: load_stats_df rezultāts (department, month, n, ...).
+    """
+    dept_counts = stats_df.groupby("department")["n"].sum()
+    small_months = stats_df.loc[stats_df["n"] < k, ["department", "month"]]
+    return {
+        "k": k,
+        "department_counts": {d: int(n) for d, n in dept_counts.items()},
+        "small_departments": frozenset(dept_counts.index[dept_counts < k]),
+        "small_months": frozenset(small_months.itertuples(index=False, name=None)),
+    }
+
+
+def is_suppressed(check, department):
+    """Vai nodaļai ir par maz atbilžu, lai to rādītu atsevišķi"""
+    return check["department_counts"].get(department, 0) < check["k"]
+
+
+def suppressed_months(check, department):
+    """Nodaļas mēneši (YYYY-MM), kurus nedrīkst rādīt"""
+    return {month for dept, month in check["small_months"] if dept == department}
+
+
+def protect_stats(stats_df, check):
+    """
+    Izmet no load_stats_df rezultāta nodaļas un nodaļu mēnešus zem sliekšņa,
+    lai nozīmības aprēķini (salīdzinājums ar iepriekšējo mēnesi, tendence)
+    neatklātu neko par paslēptajām šūnām.
+    """
+    if stats_df.empty:
+        return stats_df
+    pairs = pd.Series(list(zip(stats_df["department"], stats_df["month"])), index=stats_df.index)
+    hidden = stats_df["department"].isin(check["small_departments"]) | pairs.isin(check["small_months"])
+    return stats_df[~hidden]
+
+
+def protect_departments(table, check):
+    """
+    Tabulā pa nodaļām (indekss = department) apvieno nodaļas zem sliekšņa
+    vienā rindā ar atbilžu skaitu svērtu vidējo. Ja arī apvienotā rinda
+    ir zem sliekšņa, tā tiek izlaista.
+    """
+    counts = pd.Series(check["department_counts"], dtype="int64")
+    counts = counts.reindex(table.index).fillna(0)
+    small = counts < check["k"]
+    if not small.any():
+        return table
+
+    visible = table[~small.values]
+    hidden = table[small.values & (counts > 0).values]
+    weights = counts[small & (counts > 0)]
+    if weights.sum() < check["k"]:
+        return visible
+
+    merged = {}
+    for col in table.columns:
+        if col in SUM_COLUMNS:
+            merged[col] = hidden[col].sum()
+        elif pd.api.types.is_numeric_dtype(table[col]):
+            merged[col] = (hidden[col] * weights.values).sum() / weights.sum()
+        else:
+            merged[col] = None
+    merged_row = pd.DataFrame([merged], index=pd.Index([MERGED_LABEL], name=table.index.name))
+    return pd.concat([visible, merged_row])
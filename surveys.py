@@ -0,0 +1,131 @@
+"""Aptaujas definīcijas: jautājumi, skalas un rādītāju grupas.
+
+Definīcijas ir versijotas un glabājas datubāzē (``survey_definitions``) kā JSON.
+Atbildes glabā garā formā (``answers``), tāpēc jaunai versijai nav vajadzīga
+tabulu pārrakstīšana – pietiek publicēt jaunu definīciju.
+"""
+
+DEFAULT_SURVEY = {
+    "version": 1,
+    "title": "Enter your wellbeing indicators",
+    "questions": [
+        {"id": "stress_q1", "group": "stress", "min": 0, "max": 10, "default": 5,
+         "text": "How intense do you find your daily workload? (0-10, 0 = very light, 10 = too heavy)"},
+        {"id": "stress_q2", "group": "stress", "min": 0, "max": 10, "default": 5,
+         "text": "To what extent do work-related issues cause you anxiety? (0-10, 0 = not at all, 10 = to a very great extent)"},
+        {"id": "stress_q3", "group": "stress", "min": 0, "max": 10, "default": 5,
+         "text": "How exhausted do you feel due to your work? (0-10, 0 = not exhausted at all, 10 = extremely exhausted)"},
+        {"id": "motivation_q1", "group": "motivation", "min": 0, "max": 10, "default": 5,
+         "text": "Rate your motivation to perform daily work tasks. (0-10, 0 = not motivated at all, 10 = extremely motivated)"},
+        {"id": "motivation_q2", "group": "motivation", "min": 0, "max": 10, "default": 5,
+         "text": "How inspired do you feel at work?(0-10, 0 = not inspired at all, 10 = extremely inspired)"},
+        {"id": "motivation_q3", "group": "motivation", "min": 0, "max": 10, "default": 5,
+         "text": "Rate how valued you feel for the work you do. (0-10, 0 = not valued at all, 10 = extremely valued)"},
+    ],
+    # Grupu secība nosaka secību dashboardā
+    "groups": [
+        # critical: robeža, pie kuras nodaļa tiek atzīmēta kā kritiska
+        {"id": "motivation", "label": "Motivation", "higher_is_better": True, "critical": 4, "color": "#8E99BC"},
+        {"id": "stress", "label": "Stress", "higher_is_better": False, "critical": 7, "color": "#A6192E"},
+    ],
+}
+
+
+def validate(survey):
+    """Pārbauda definīcijas struktūru; kļūdas gadījumā ValueError"""
+    if not isinstance(survey.get("version"), int):
+        raise ValueError("Survey definition needs an integer 'version'")
+    group_ids = [g["id"] for g in survey.get("groups", [])]
+    if not group_ids:
+        raise ValueError("Survey definition has no groups")
+    if len(set(group_ids)) != len(group_ids):
+        raise ValueError("Duplicate group ids in survey definition")
+    for g in survey["groups"]:
+        if "label" not in g or not isinstance(g.get("higher_is_better"), bool):
+            raise ValueError(f"Group {g['id']} needs a 'label' and a boolean 'higher_is_better'")
+    question_ids = [q["id"] for q in survey.get("questions", [])]
+    if not question_ids:
+        raise ValueError("Survey definition has no questions")
+    if len(set(question_ids)) != len(question_ids):
+        raise ValueError("Duplicate question ids in survey definition")
+    for q in survey["questions"]:
+        if not q.get("text"):
+            raise ValueError(f"Question {q['id']} needs a 'text'")
+        if q.get("group") is not None and q["group"] not in group_ids:
+            raise ValueError(f"Question {q['id']} refers to unknown group {q['group']}")
+        if "min" not in q or "max" not in q:
+            raise ValueError(f"Question {q['id']} needs a 'min' and 'max' scale")
+        if not q["min"] <= q.get("default", q["min"]) <= q["max"]:
+            raise ValueError(f"Question {q['id']} has a default outside its scale")
+    if not any(q.get("group") is not None for q in survey["questions"]):
+        raise ValueError("Survey definition has no questions in a group")
+    return survey
+
+
+def question_ids(survey):
+    return [q["id"] for q in survey["questions"]]
+
+
+def group_questions(survey):
+    """{grupa: [jautājumu id]} definīcijas grupu secībā"""
+    result = {g["id"]: [] for g in survey["groups"]}
+    for q in survey["questions"]:
+        if q.get("group") in result:
+            result[q["group"]].append(q["id"])
+    return result
+
+
+def group_scale(survey, group_id):
+    """Grupas jautājumu skala (min, max)"""
+    questions = [q for q in survey["questions"] if q.get("group") == group_id]
+    return min(q["min"] for q in questions), max(q["max"] for q in questions)
+
+
+def scores(survey, answers):
+    """Katras grupas rādītājs vienai atbildei (grupas jautājumu vidējais)"""
+    result = {}
+    for group, qids in group_questions(survey).items():
+        values = [answers[q] for q in qids if answers.get(q) is not None]
+        if values:
+            result[group] = sum(values) / len(values)
+    return result
+
+
+def combined(surveys):
+    """
+    Apvieno visas publicētās versijas dashboarda vajadzībām: grupu apraksti no
+    jaunākās versijas, jautājumu un grupu saraksti – visu versiju apvienojums.
+    surveys: {version: definīcija}
+    """
+    groups = {}
+    columns = []
+    members = {}
+    scales = {}
+    for version in sorted(surveys, reverse=True):
+        survey = surveys[version]
+        for g in survey["groups"]:
+            groups.setdefault(g["id"], g)
+        for q in survey["questions"]:
+            if q["id"] not in columns:
+                columns.append(q["id"])
+            if q.get("group") is not None:
+                qids = members.setdefault(q["group"], [])
+                if q["id"] not in qids:
+                    qids.append(q["id"])
+                low, high = scales.get(q["group"], (q["min"], q["max"]))
+                scales[q["group"]] = (min(low, q["min"]), max(high, q["max"]))
+    return {
+        "groups": [g for g in groups.values() if g["id"] in members],
+        "question_ids": columns,
+        "group_questions": {g: members[g] for g in groups if g in members},
+        "scales": scales,
+    }
+
+
+def is_critical(group, value):
+    """Vai grupas vidējā vērtība sasniedz kritisko robežu"""
+    if group.get("critical") is None:
+        return False
+    if group["higher_is_better"]:
+        return value <= group["critical"]
+    return value >= group["critical"]
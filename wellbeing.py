@@ -1,169 +1,28 @@
+import os
+
 import streamlit as st
 import pandas as pd
-import sqlite3
-from datetime import datetime
 import seaborn as sns
 import matplotlib.pyplot as plt
 import io
+from datetime import datetime
 
+import analytics
+import privacy
+import surveys
+from compact_store import CompactStore
+from database import (
+    init_db, add_response, load_responses_df, load_stats_df, delete_responses, get_generation,
+    get_survey, get_surveys, preview_delete, restore_deleted
+)
 
-
-DB_PATH = "wellbeing.db"
+# "sqlite" (noklusējums) vai "compact" – atbildes atmiņā ar periodisku ierakstu datubāzē
+STORE_BACKEND = os.environ.get("WELLBEING_STORE", "sqlite")
 
 # ---------- Session state initialization ----------
 if 'role' not in st.session_state:
     st.session_state.role = None
 
-# ---------- Database helpers ----------
-def get_conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
-
-def check_table_exists():
-    """Pārbauda, vai tabula pastāv"""
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='responses'")
-    exists = cur.fetchone() is not None
-    conn.close()
-    return exists
-
-def check_old_structure():
-    """Pārbauda, vai tabulā ir vecās kolonnas"""
-    if not check_table_exists():
-        return False
-    
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("PRAGMA table_info(responses)")
-    columns = [col[1] for col in cur.fetchall()]
-    conn.close()
-    
-    # Vecā struktūra: motivation, stress
-    # Jaunā struktūra: stress_q1, stress_q2, stress_q3, motivation_q1, motivation_q2, motivation_q3
-    return 'motivation' in columns and 'stress' in columns
-
-def migrate_database():
-    """Migrē datus no vecās struktūras uz jauno"""
-    if not check_old_structure():
-        return
-    
-    conn = get_conn()
-    cur = conn.cursor()
-    
-    try:
-        # 1. Izveidojam jaunu tabulu ar pareizo struktūru
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS responses_new (
-                id INTEGER PRIMARY KEY,
-                timestamp TEXT,
-                department TEXT,
-                stress_q1 INTEGER,
-                stress_q2 INTEGER,
-                stress_q3 INTEGER,
-                motivation_q1 INTEGER,
-                motivation_q2 INTEGER,
-                motivation_q3 INTEGER
-            )
-        ''')
-        
-        # 2. Migrējam datus no vecās tabulas uz jauno
-        # Katram jautājumam piešķiram tādu pašu vērtību kā vidējam
-        cur.execute('''
-            INSERT INTO responses_new (id, timestamp, department, 
-                                       stress_q1, stress_q2, stress_q3,
-                                       motivation_q1, motivation_q2, motivation_q3)
-            SELECT id, timestamp, department,
-                   stress, stress, stress,
-                   motivation, motivation, motivation
-            FROM responses
-        ''')
-        
-        # 3. Dzēšam veco tabulu
-        cur.execute("DROP TABLE responses")
-        
-        # 4. Pārsaucam jauno tabulu par veco nosaukumu
-        cur.execute("ALTER TABLE responses_new RENAME TO responses")
-        
-        conn.commit()
-        print("✅ Datubāze atjaunināta uz jauno versiju")
-        
-    except Exception as e:
-        conn.rollback()
-        print(f"❌ Kļūda migrējot datubāzi: {e}")
-    finally:
-        conn.close()
-
-def init_db():
-    """Inicializē datubāzi ar pareizo struktūru"""
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute('''
-        CREATE TABLE IF NOT EXISTS responses (
-            id INTEGER PRIMARY KEY,
-            timestamp TEXT,
-            department TEXT,
-            stress_q1 INTEGER,
-            stress_q2 INTEGER,
-            stress_q3 INTEGER,
-            motivation_q1 INTEGER,
-            motivation_q2 INTEGER,
-            motivation_q3 INTEGER
-        )
-    ''')
-    conn.commit()
-    conn.close()
-    
-    # Ja atklājam veco struktūru, migrējam datus
-    if check_old_structure():
-        migrate_database()
-
-def add_response(department, stress_q1, stress_q2, stress_q3, motivation_q1, motivation_q2, motivation_q3):
-    conn = get_conn()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO responses (timestamp, department, stress_q1, stress_q2, stress_q3, motivation_q1, motivation_q2, motivation_q3) VALUES (?,?,?,?,?,?,?,?)",
-        (datetime.utcnow().isoformat(), department, stress_q1, stress_q2, stress_q3, motivation_q1, motivation_q2, motivation_q3)
-    )
-    conn.commit()
-    conn.close()
-
-def load_responses_df():
-    conn = get_conn()
-    df = pd.read_sql_query("SELECT * FROM responses", conn, parse_dates=["timestamp"])
-    conn.close()
-    if df.empty:
-        return pd.DataFrame(columns=[
-            "id", "timestamp", "department",
-            "stress_q1", "stress_q2", "stress_q3",
-            "motivation_q1", "motivation_q2", "motivation_q3"
-        ])
-    return df
-
-def delete_responses(department=None, start_date=None, end_date=None):
-    """
-    Dzēš datus pēc nodaļas un/vai datuma diapazona.
-    Ja abi parametri None, dzēš visu tabulu.
-    """
-    conn = get_conn()
-    cur = conn.cursor()
-    
-    query = "DELETE FROM responses WHERE 1=1"
-    params = []
-
-    if department:
-        query += " AND department = ?"
-        params.append(department)
-    if start_date:
-        query += " AND DATE(timestamp) >= ?"
-        params.append(start_date.strftime("%Y-%m-%d"))
-    if end_date:
-        query += " AND DATE(timestamp) <= ?"
-        params.append(end_date.strftime("%Y-%m-%d"))
-
-    cur.execute(query, params)
-    conn.commit()
-    conn.close()
-
 # ---------------------------------------------------------------
 # ----------------------  UI STYLE ADDITIONS  --------------------
 # ---------------------------------------------------------------
@@ -414,8 +273,39 @@ if st.session_state.role is None:
     
     st.stop()
 
-# Initialize database with migration support
-init_db()
+# Initialize database with migration support (vienreiz procesā, nevis katrā Streamlit pārlādē)
+@st.cache_resource
+def init_schema():
+    init_db()
+
+init_schema()
+
+# Aktīvā aptauja (formai) un visu versiju apvienojums (dashboardam)
+survey = get_survey()
+survey_layout = surveys.combined(get_surveys())
+metric_groups = survey_layout["groups"]
+metric_ids = [g["id"] for g in metric_groups]
+
+# Dashboarda krāsas: zils = labs, sarkans = slikts
+GOOD_COLOR = "#8E99BC"
+BAD_COLOR = "#A6192E"
+
+@st.cache_resource
+def get_compact_store():
+    """Kompaktā glabātuve tiek ielādēta vienreiz procesā (visas aptaujas versijas)"""
+    return CompactStore(get_survey())
+
+store = get_compact_store() if STORE_BACKEND == "compact" else None
+if store is not None and store.survey["version"] != survey["version"]:
+    # Publicēta jauna versija: glabātuve ieraksta vecās versijas atbildes un pārlādējas
+    store.switch(survey)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def get_anonymity_check(generation, start_date, end_date, k=privacy.MIN_RESPONSES):
+    """k-anonimitātes pārbaude tiek aprēķināta vienreiz uz statistikas paaudzi"""
+    # generation netiek lietots iekšā – tas tikai maina kešatmiņas atslēgu, kad mainās dati;
+    # katra iesniegšana rada jaunu paaudzi, tāpēc max_entries ierobežo vecos ierakstus
+    return privacy.anonymity_check(load_stats_df(start_date, end_date), k)
 
 # ---------- HEADER WITH LOGO ----------
 # Samazina top padding, bet ne līdz nullei
@@ -446,7 +336,7 @@ if view == "Fill in survey":
     st.markdown('<div class="form-container">', unsafe_allow_html=True)
     st.markdown('<div class="msc-form">', unsafe_allow_html=True)
     
-    st.markdown('<div class="form-header">Enter your wellbeing indicators</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="form-header">{survey["title"]}</div>', unsafe_allow_html=True)
     # st.markdown('<div class="form-subheader">Department</div>', unsafe_allow_html=True)
     
     departments = [
@@ -466,48 +356,36 @@ if view == "Fill in survey":
         key="employee_department"
     )
 
-    # ---------- STRESS SECTION ----------
-    st.markdown('<div class="section-title">1.) How intense do you find your daily workload? (0-10, 0 = very light, 10 = too heavy)</div>', unsafe_allow_html=True)
-    stress_q1 = st.slider("", 0, 10, 5, key="stress_q1")
-
-    st.markdown('<div class="section-title">2.) To what extent do work-related issues cause you anxiety? (0-10, 0 = not at all, 10 = to a very great extent)</div>', unsafe_allow_html=True)
-    stress_q2 = st.slider("", 0, 10, 5, key="stress_q2")
-
-    st.markdown('<div class="section-title">3.) How exhausted do you feel due to your work? (0-10, 0 = not exhausted at all, 10 = extremely exhausted)</div>', unsafe_allow_html=True)
-    stress_q3 = st.slider("", 0, 10, 5, key="stress_q3")
-    
-    # Aprēķina stress vidējo (tikai attēlošanai)
-    stress_avg = round((stress_q1 + stress_q2 + stress_q3) / 3, 2)
-    
-    # ---------- MOTIVATION SECTION ----------
-    st.markdown('<div class="section-title">4.) Rate your motivation to perform daily work tasks. (0-10, 0 = not motivated at all, 10 = extremely motivated)</div>', unsafe_allow_html=True)
-    motivation_q1 = st.slider("", 0, 10, 5, key="motivation_q1")
-
-    st.markdown('<div class="section-title">5.) How inspired do you feel at work?(0-10, 0 = not inspired at all, 10 = extremely inspired)</div>', unsafe_allow_html=True)
-    motivation_q2 = st.slider("", 0, 10, 5, key="motivation_q2")
-
-    st.markdown('<div class="section-title">6.) Rate how valued you feel for the work you do. (0-10, 0 = not valued at all, 10 = extremely valued)</div>', unsafe_allow_html=True)
-    motivation_q3 = st.slider("", 0, 10, 5, key="motivation_q3")
+    # ---------- JAUTĀJUMI (no aptaujas definīcijas) ----------
+    answers = {}
+    for number, question in enumerate(survey["questions"], start=1):
+        st.markdown(f'<div class="section-title">{number}.) {question["text"]}</div>', unsafe_allow_html=True)
+        answers[question["id"]] = st.slider(
+            "", question["min"], question["max"], question.get("default", question["min"]), key=question["id"]
+        )
     
-    # Aprēķina motivation vidējo (tikai attēlošanai)
-    motivation_avg = round((motivation_q1 + motivation_q2 + motivation_q3) / 3, 2)
+    # Aprēķina grupu vidējos (tikai attēlošanai), secībā, kādā grupas parādās jautājumos
+    form_scores = surveys.scores(survey, answers)
+    first_question = {q["group"]: i for i, q in reversed(list(enumerate(survey["questions"]))) if q.get("group")}
+    form_groups = sorted(
+        (g for g in survey["groups"] if g["id"] in form_scores),
+        key=lambda g: first_question[g["id"]]
+    )
     
     # Parāda aprēķinātās vidējās vērtības
-    col1, col2 = st.columns(2)
-    with col1:
-        st.metric("Your average stress ", f"{stress_avg}/10")
-    with col2:
-        st.metric("Your average motivation ", f"{motivation_avg}/10")
+    for col, group in zip(st.columns(len(form_groups)), form_groups):
+        with col:
+            scale_max = surveys.group_scale(survey, group["id"])[1]
+            st.metric(f"Your average {group['label'].lower()} ", f"{round(form_scores[group['id']], 2)}/{scale_max}")
     
     if st.button("Submit"):
         if department == "Select department":
             st.warning("Please select a department before submitting.")
         else:
-            add_response(
-                department,
-                stress_q1, stress_q2, stress_q3,
-                motivation_q1, motivation_q2, motivation_q3
-            )
+            if store is not None:
+                store.append(department, answers)
+            else:
+                add_response(department, answers, survey)
             st.success("Thank you — your response has been saved.")
     
     st.markdown('</div>', unsafe_allow_html=True)
@@ -526,7 +404,12 @@ elif view == "HR Dashboard":
     hr_pw = st.text_input("Enter HR password", type="password", key="hr_password")
     
     if hr_pw == HR_PASSWORD:
-        df = load_responses_df()
+        if store is not None:
+            # Statistikas tabulai jābūt aktuālai pirms nozīmības aprēķiniem
+            store.flush()
+            df = store.to_frame()
+        else:
+            df = load_responses_df()
         
         if df.empty:
             st.info("No data available yet.")
@@ -556,26 +439,36 @@ elif view == "HR Dashboard":
             end_date = st.date_input("End date", value=df['timestamp'].max().date(), key="hr_end_date")
             
             # Filtrējam datus pēc datumiem
-            filtered_df = df[(df['timestamp'].dt.date >= start_date) & 
-                             (df['timestamp'].dt.date <= end_date)]
-            
-            if selected_dept != "All departments":
-                filtered_df = filtered_df[filtered_df['department'] == selected_dept]
+            if store is not None:
+                dept_filter = None if selected_dept == "All departments" else selected_dept
+                filtered_df = store.to_frame(dept_filter, start_date, end_date)
+            else:
+                filtered_df = df[(df['timestamp'].dt.date >= start_date) & 
+                                 (df['timestamp'].dt.date <= end_date)]
+                
+                if selected_dept != "All departments":
+                    filtered_df = filtered_df[filtered_df['department'] == selected_dept]
+
+            # Anonimitātes pārbaude (kešota līdz nākamajām datu izmaiņām)
+            anon = get_anonymity_check(get_generation(), start_date, end_date)
+            dept_hidden = selected_dept != "All departments" and privacy.is_suppressed(anon, selected_dept)
             
             # ---------------- Excel lejupielāde ----------------
-            if not filtered_df.empty:
+            if dept_hidden:
+                st.info(f"Fewer than {anon['k']} responses in the selected period – results are hidden to protect anonymity.")
+            elif not filtered_df.empty:
                 output = io.BytesIO()
+                # Eksporta kolonnas – visu aptaujas versiju jautājumi
+                export_columns = [c for c in survey_layout["question_ids"] if c in filtered_df.columns]
                 with pd.ExcelWriter(output, engine='openpyxl') as writer:
                     if selected_dept == "All departments":
-                        df_to_export = filtered_df.groupby('department')[[
-                            'stress_q1','stress_q2','stress_q3','motivation_q1','motivation_q2','motivation_q3'
-                        ]].mean().round(2).reset_index()
+                        df_to_export = privacy.protect_departments(
+                            filtered_df.groupby('department')[export_columns].mean(), anon
+                        ).round(2).reset_index()
                         sheet_name = "Avg_by_department"
                         file_name = "wellbeing_avg_by_department.xlsx"
                     else:
-                        df_to_export = pd.DataFrame([filtered_df[[
-                            'stress_q1','stress_q2','stress_q3','motivation_q1','motivation_q2','motivation_q3'
-                        ]].mean().round(2)])
+                        df_to_export = pd.DataFrame([filtered_df[export_columns].mean().round(2)])
                         sheet_name = f"{selected_dept}_report"
                         file_name = f"wellbeing_{selected_dept}_report.xlsx"
                     
@@ -595,90 +488,119 @@ elif view == "HR Dashboard":
             # ---------------- Heatmap un kritiskās nodaļas ----------------
             filtered_df = filtered_df.copy()
 
-            filtered_df['stress'] = filtered_df[['stress_q1','stress_q2','stress_q3']].mean(axis=1)
-            filtered_df['motivation'] = filtered_df[['motivation_q1','motivation_q2','motivation_q3']].mean(axis=1)
+            # Grupu rādītāji (piem., stress, motivation) – grupas jautājumu vidējais
+            for group_id, qids in survey_layout["group_questions"].items():
+                filtered_df[group_id] = filtered_df[[q for q in qids if q in filtered_df.columns]].mean(axis=1)
 
             if selected_dept == "All departments":
-                grouped = filtered_df.groupby('department')[['motivation','stress']].mean().round(2)
-                
-                # Pievieno atbilžu skaitu
-                grouped['total_responses'] = filtered_df.groupby('department').size()
+                if store is not None:
+                    grouped = store.aggregate(dept_filter, start_date, end_date).reindex(columns=metric_ids + ['total_responses'])
+                else:
+                    grouped = filtered_df.groupby('department')[metric_ids].mean()
+                    
+                    # Pievieno atbilžu skaitu
+                    grouped['total_responses'] = filtered_df.groupby('department').size()
+
+                # Nodaļas zem anonimitātes sliekšņa apvieno vienā rindā
+                grouped = privacy.protect_departments(grouped, anon)
+                grouped[metric_ids] = grouped[metric_ids].round(2)
+
+                # Ticamības intervāli un nozīmības karodziņi no uzkrātās statistikas
+                significance = analytics.summarize_departments(
+                    privacy.protect_stats(load_stats_df(start_date, end_date), anon)
+                )
+                grouped = grouped.join(significance)
+                grouped['significance'] = grouped['significance'].fillna("")
                 
                 st.markdown('<div class="section-title" style="font-size: 20px; margin-top: 30px;">Average indicators by department</div>', unsafe_allow_html=True)
                 st.dataframe(grouped)
+                st.markdown("""
+                <div style="font-size:13px; color:#666;">
+                <b>*_ci</b> – ± half-width of the 95% confidence interval, <b>*_trend</b> – change per month.
+                The significance column lists only changes that are statistically significant (p &lt; 0.05).
+                </div>
+                """, unsafe_allow_html=True)
 
                 # Kopējais atbilžu skaits visām nodaļām
                 total_responses_all = filtered_df.shape[0]
                 st.metric("Total number of responses (all departments)", total_responses_all)
                 
-                # Heatmap
-                fig, axs = plt.subplots(1, 2, figsize=(18, max(4, len(grouped)*0.)))
-                # Motivation: zils = labs (10), sarkans = slikts (0)
-                motivation_cmap = sns.blend_palette(["#A6192E", "#8E99BC"], as_cmap=True, n_colors=256)
-
-                # Stress: sarkans = slikts (10), zils = labs (0)
-                stress_cmap = sns.blend_palette(["#8E99BC", "#A6192E"], as_cmap=True, n_colors=256)
-
-                
-                sns.heatmap(grouped[['motivation']].T, annot=True, fmt=".2f", cmap=motivation_cmap, ax=axs[0], vmin=0, vmax=10,
-                            annot_kws={'color': 'black', 'fontweight': 'bold', 'fontsize': 12})
-                axs[0].set_title('Motivation (higher = better)')
-                axs[0].set_ylabel('')
-                
-                sns.heatmap(grouped[['stress']].T, annot=True, fmt=".2f", cmap=stress_cmap, ax=axs[1], vmin=0, vmax=10,
-                            annot_kws={'color': 'black', 'fontweight': 'bold', 'fontsize': 12})
-                axs[1].set_title('Stress (higher = worse)')
-                axs[1].set_ylabel('')
-                axs[1].invert_yaxis()  # stress heatmap ass atgriež pareizajā orientācijā
+                if grouped.empty:
+                    st.info(f"Too few responses to show departments (minimum {anon['k']} per department).")
+                else:
+                    # Heatmap – viens katrai rādītāju grupai
+                    fig, axs = plt.subplots(1, len(metric_groups), figsize=(18, max(4, len(grouped)*0.)), squeeze=False)
+                    axs = axs[0]
+                    for ax, group in zip(axs, metric_groups):
+                        # Krāsu skala: zils = labs, sarkans = slikts
+                        palette = [BAD_COLOR, GOOD_COLOR] if group["higher_is_better"] else [GOOD_COLOR, BAD_COLOR]
+                        cmap = sns.blend_palette(palette, as_cmap=True, n_colors=256)
+                        vmin, vmax = survey_layout["scales"][group["id"]]
+
+                        sns.heatmap(grouped[[group['id']]].T, annot=True, fmt=".2f", cmap=cmap, ax=ax, vmin=vmin, vmax=vmax,
+                                    annot_kws={'color': 'black', 'fontweight': 'bold', 'fontsize': 12})
+                        direction = "higher = better" if group["higher_is_better"] else "higher = worse"
+                        ax.set_title(f"{group['label']} ({direction})")
+                        ax.set_ylabel('')
+                        ax.set_facecolor('white')
+                        if not group["higher_is_better"]:
+                            ax.invert_yaxis()  # stress heatmap ass atgriež pareizajā orientācijā
 
                 
-                fig.patch.set_facecolor('white')
-                axs[0].set_facecolor('white')
-                axs[1].set_facecolor('white')
-                plt.tight_layout()
-                st.pyplot(fig)
+                    fig.patch.set_facecolor('white')
+                    plt.tight_layout()
+                    st.pyplot(fig)
                 
-                critical = grouped[(grouped['stress'] >= 7) | (grouped['motivation'] <= 4)]
-                if critical.empty:
-                    st.success("👍 No critical departments identified.")
-                else:
-                    st.warning("⚠ Critical departments identified:")
-                    st.dataframe(critical)
+                    # Kritiskās robežas nāk no aptaujas grupu definīcijām
+                    critical_mask = pd.Series(False, index=grouped.index)
+                    for group in metric_groups:
+                        critical_mask |= grouped[group['id']].map(
+                            lambda value, group=group: pd.notna(value) and surveys.is_critical(group, value)
+                        )
+                    critical = grouped[critical_mask]
+                    if critical.empty:
+                        st.success("👍 No critical departments identified.")
+                    else:
+                        st.warning("⚠ Critical departments identified:")
+                        st.dataframe(critical)
             
             else:
                 dept_data = filtered_df[filtered_df['department'] == selected_dept]
-                if len(dept_data) > 0:
-                    avg_motivation = dept_data['motivation'].mean().round(2)
-                    avg_stress = dept_data['stress'].mean().round(2)
+                if dept_hidden:
+                    st.warning(f"⚠ {selected_dept} has fewer than {anon['k']} responses in this period – indicators are hidden to protect anonymity.")
+                elif len(dept_data) > 0:
+                    averages = {g['id']: round(dept_data[g['id']].mean(), 2) for g in metric_groups}
                     total_responses = len(dept_data)
                     
-                    col1, col2, col3 = st.columns(3)
-                    col1.metric("Average motivation", f"{avg_motivation}/10")
-                    col2.metric("Average stress", f"{avg_stress}/10")
-                    col3.metric("Number of responses", total_responses)
+                    metric_cols = st.columns(len(metric_groups) + 1)
+                    for col, group in zip(metric_cols, metric_groups):
+                        col.metric(f"Average {group['label'].lower()}", f"{averages[group['id']]}/{survey_layout['scales'][group['id']][1]}")
+                    metric_cols[-1].metric("Number of responses", total_responses)
                     
                     # Heatmap vienai nodaļai
                     single_dept_data = pd.DataFrame({
-                        'metric': ['Motivation', 'Stress'],
-                        'value': [avg_motivation, avg_stress]
+                        'metric': [g['label'] for g in metric_groups],
+                        'value': [averages[g['id']] for g in metric_groups]
                     }).set_index('metric')
                     
                     fig_single, ax_single = plt.subplots(figsize=(8, 2))
                     
                     # Izveido custom divkrāsu gradientu
-                    colors = ["#8E99BC", "#A6192E"]
+                    colors = [GOOD_COLOR, BAD_COLOR]
                     custom_cmap = sns.blend_palette(colors, as_cmap=True, n_colors=256)
+                    scale_min = min(survey_layout['scales'][g][0] for g in metric_ids)
+                    scale_max = max(survey_layout['scales'][g][1] for g in metric_ids)
                     
-                    # Heatmap ar vienu rindu (Motivation un Stress)
+                    # Heatmap ar vienu rindu (viena šūna katram rādītājam)
                     sns.heatmap(single_dept_data.T, 
                                annot=single_dept_data.T.round(2), 
                                fmt='', 
                                cmap=custom_cmap, 
                                cbar=True, 
                                ax=ax_single, 
-                               vmin=0, 
-                               vmax=10,
-                               cbar_kws={'label': 'Rating (0-10)'},
+                               vmin=scale_min, 
+                               vmax=scale_max,
+                               cbar_kws={'label': f'Rating ({scale_min}-{scale_max})'},
                                annot_kws={'color': 'black', 'fontweight': 'bold', 'fontsize': 14})
                     
                     ax_single.set_title(f'{selected_dept} - Comparison of indicators')
@@ -691,11 +613,14 @@ elif view == "HR Dashboard":
                     
                     # ============= COMBINED MONTHLY VIEW STABIŅU DIAGRAMMA =============
                     st.markdown('<div class="section-title" style="font-size: 20px; margin-top: 40px;">Monthly trends for ' + selected_dept + '</div>', unsafe_allow_html=True)
-                    st.markdown("""
+                    interpretation = "<br>".join(
+                        f"{g['label']} scores: higher values = {'better' if g['higher_is_better'] else 'worse'} wellbeing."
+                        for g in metric_groups
+                    )
+                    st.markdown(f"""
                     <div style="font-size:13px; margin-top:15px; color:#666;">
-                    <b>Interpretation note:</b>  
-                    Stress scores represent negative wellbeing (higher values = more stress),  
-                    while motivation scores represent positive engagement (higher values = more motivation).
+                    <b>Interpretation note:</b><br>
+                    {interpretation}
                     </div>
                     """, unsafe_allow_html=True)
                     # Izveido mēneša kolonnu
@@ -703,44 +628,62 @@ elif view == "HR Dashboard":
                     
                     # Grupē pēc mēneša
                     monthly_dept = dept_data.groupby('month').agg({
-                        'stress': 'mean',
-                        'motivation': 'mean',
+                        **{m: 'mean' for m in metric_ids},
                         'id': 'count'  # skaits
                     }).reset_index().round(2)
                     
                     # Sakārto mēnešus alfabētiski (chronoloģiski)
                     monthly_dept = monthly_dept.sort_values('month')
+
+                    # Mēneši zem anonimitātes sliekšņa netiek rādīti
+                    hidden_months = privacy.suppressed_months(anon, selected_dept)
+                    monthly_dept = monthly_dept[~monthly_dept['month'].isin(hidden_months)]
+                    if hidden_months:
+                        st.markdown(f"""
+                        <div style="font-size:13px; margin-top:10px; color:#666;">
+                        {len(hidden_months)} month(s) with fewer than {anon['k']} responses are hidden to protect anonymity.
+                        </div>
+                        """, unsafe_allow_html=True)
+
+                    # Ticamības intervāli un izmaiņu nozīmība no uzkrātās statistikas
+                    dept_stats = privacy.protect_stats(load_stats_df(start_date, end_date), anon)
+                    monthly_stats = analytics.monthly_summary(dept_stats[dept_stats['department'] == selected_dept])
+                    monthly_ci = monthly_stats.reindex(monthly_dept['month']) if not monthly_stats.empty else None
                     
                     if not monthly_dept.empty:
-                        # Bar colors
-                        bar_color_motivation = '#8E99BC'  # zils/grišs motivācijai
-                        bar_color_stress = '#A6192E'      # sarkans stresam
-                        
                         fig3, ax3 = plt.subplots(figsize=(12, 6))
                         
                         x = range(len(monthly_dept['month']))
-                        width = 0.35
+                        width = 0.7 / len(metric_groups)
                         
-                        bars_motivation = ax3.bar([i - width/2 for i in x], monthly_dept['motivation'], 
-                                                 width, label='Motivation', color=bar_color_motivation, 
-                                                 edgecolor='black', linewidth=1)
-                        bars_stress = ax3.bar([i + width/2 for i in x], monthly_dept['stress'], 
-                                             width, label='Stress', color=bar_color_stress, 
-                                             edgecolor='black', linewidth=1)
+                        all_bars = []
+                        for k, group in enumerate(metric_groups):
+                            offset = (k - (len(metric_groups) - 1) / 2) * width
+                            # 95% ticamības intervāli kā kļūdu joslas (nav, ja mēnesī < 2 atbildes)
+                            ci_column = f"{group['id']}_ci"
+                            err = None
+                            if monthly_ci is not None and ci_column in monthly_ci:
+                                err = monthly_ci[ci_column].astype(float).fillna(0).values
+                            all_bars.append(ax3.bar([i + offset for i in x], monthly_dept[group['id']],
+                                                    width, label=group['label'], color=group.get('color', GOOD_COLOR),
+                                                    edgecolor='black', linewidth=1,
+                                                    yerr=err, capsize=4))
                         
                         ax3.set_title(f'{selected_dept} - Monthly averages comparison', fontweight='bold', fontsize=16, pad=20)
-                        ax3.set_ylabel('Rating (0-10)', fontweight='bold')
+                        ax3.set_ylabel(f'Rating ({scale_min}-{scale_max})', fontweight='bold')
                         ax3.set_xlabel('Month', fontweight='bold')
                         ax3.set_xticks(x)
                         ax3.set_xticklabels(monthly_dept['month'], rotation=45, ha='right')
                         ax3.grid(True, axis='y', linestyle='--', alpha=0.3)
-                        ax3.set_ylim(0, 10)
+                        ax3.set_ylim(scale_min, scale_max)
                         ax3.legend(fontsize=12)
                         
                         # Pievieno vērtības virs stabiņiem
-                        for bars in [bars_motivation, bars_stress]:
+                        for bars in all_bars:
                             for bar in bars:
                                 height = bar.get_height()
+                                if pd.isna(height):
+                                    continue
                                 ax3.text(bar.get_x() + bar.get_width()/2., height + 0.1,
                                         f'{height:.1f}', ha='center', va='bottom', fontweight='bold', fontsize=9)
                         
@@ -751,13 +694,22 @@ elif view == "HR Dashboard":
                         
                         # Rādīt atbilžu skaitu pa mēnešiem
                         st.markdown('<div class="section-title" style="font-size: 16px; margin-top: 20px;">Responses per month</div>', unsafe_allow_html=True)
-                        responses_by_month = monthly_dept[['month', 'id']].rename(columns={'id': 'responses'})
-                        st.dataframe(responses_by_month.set_index('month'))
+                        responses_by_month = monthly_dept[['month', 'id']].rename(columns={'id': 'responses'}).set_index('month')
+                        if monthly_ci is not None:
+                            # p vērtības izmaiņai pret iepriekšējo mēnesi (Welch t-tests)
+                            significant = pd.Series(False, index=responses_by_month.index)
+                            for m in metric_ids:
+                                if f"{m}_change_p" not in monthly_ci:
+                                    continue
+                                responses_by_month[f'{m}_change_p'] = monthly_ci[f'{m}_change_p'].astype(float).round(3)
+                                significant |= monthly_ci[f'{m}_change_sig'].fillna(False).astype(bool)
+                            responses_by_month['significant_change'] = significant.map({True: "yes", False: ""})
+                        st.dataframe(responses_by_month)
 
         # ---------------- Dzēšanas sadaļa apakšā ----------------
         st.markdown('<hr>', unsafe_allow_html=True)
         st.markdown('<div class="section-title" style="font-size: 18px;">⚠ Delete data</div>', unsafe_allow_html=True)
-        st.markdown("Select a date range to permanently delete records.")
+        st.markdown("Select a date range to delete records. Deleted records can be restored below.")
 
         # Pārvēršam timestamp uz datetime
         df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
@@ -772,12 +724,33 @@ elif view == "HR Dashboard":
         del_start = st.date_input("Delete from date", value=min_date, key="del_start")
         del_end = st.date_input("Delete to date", value=max_date, key="del_end")
 
-        confirm_delete = st.checkbox("I understand that this action is irreversible", key="confirm_delete")
+        dept_param = None if df.empty or selected_dept == "All departments" else selected_dept
+        to_delete = preview_delete(department=dept_param, start_date=del_start, end_date=del_end)
+        st.markdown(f"**{to_delete}** responses match this selection.")
 
-        if confirm_delete and st.button("Delete selected data", key="delete_button"):
-            dept_param = None if selected_dept == "All departments" else selected_dept
-            delete_responses(department=dept_param, start_date=del_start, end_date=del_end)
-            st.success("✅ Data successfully deleted.")
+        confirm_delete = st.checkbox("I understand that the selected data will be deleted", key="confirm_delete")
+
+        if confirm_delete and to_delete and st.button("Delete selected data", key="delete_button"):
+            if store is not None:
+                store.delete(department=dept_param, start_date=del_start, end_date=del_end)
+            else:
+                delete_responses(department=dept_param, start_date=del_start, end_date=del_end)
+            st.success(f"✅ {to_delete} responses deleted.")
+
+        # ---------------- Atjaunošana uz laika punktu ----------------
+        st.markdown('<div class="section-title" style="font-size: 18px;">↺ Restore deleted data</div>', unsafe_allow_html=True)
+        st.markdown("Restore responses that existed at the selected moment (UTC) and have been deleted since.")
+        restore_day = st.date_input("Restore as of date", value=datetime.utcnow().date(), key="restore_day")
+        restore_time = st.time_input("Restore as of time (UTC)", value=datetime.utcnow().time().replace(microsecond=0), key="restore_time")
+
+        if st.button("Restore deleted data", key="restore_button"):
+            as_of = datetime.combine(restore_day, restore_time)
+            try:
+                restored = store.restore(as_of) if store is not None else restore_deleted(as_of)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.success(f"✅ {restored} responses restored.")
     
     elif hr_pw:
         st.error("Incorrect password.")